@@ -11,26 +11,57 @@ import os
 from typing import Dict, List, Tuple, Optional
 import traceback
 import html
+import mmap
+import codecs
+import csv
+import json
+import difflib
+import argparse
+import sys
+import itertools
+
+# Columns of a validation result row, in report order
+REPORT_COLUMNS = [
+    'Word Question Label',
+    'XML Question Label',
+    'Present in Word',
+    'Present in XML',
+    'Sequence Status',
+    'Word Sequence Position',
+    'XML Sequence Position',
+    'Status',
+    'Error Description'
+]
 
 class SurveyQAValidator:
     def __init__(self, root):
         self.root = root
-        self.root.title("Decipher Survey QA Validator")
-        self.root.geometry("900x700")
-        self.root.configure(bg='#1e1e1e')
         
         # File paths
         self.word_file = None
         self.xml_file = None
         
+        # Report settings
+        self.report_format = 'xlsx'
+        self.output_file = None
+        
         # Data storage
         self.word_questions = []
         self.xml_questions = []
         self.validation_results = []
+        self.loop_index = {}
+        self.word_lookup = {}
+        self.xml_lookup = {}
         
-        self.setup_ui()
+        # Headless (command line) runs have no window to build
+        if self.root is not None:
+            self.setup_ui()
     
     def setup_ui(self):
+        self.root.title("Decipher Survey QA Validator")
+        self.root.geometry("900x700")
+        self.root.configure(bg='#1e1e1e')
+        
         # Title
         title_frame = tk.Frame(self.root, bg='#1e1e1e')
         title_frame.pack(pady=20)
@@ -79,6 +110,19 @@ class SurveyQAValidator:
                            padx=15, pady=5, relief='flat', cursor='hand2')
         xml_btn.pack(side='right')
         
+        # Report Format
+        format_frame = tk.Frame(upload_frame, bg='#2d2d2d')
+        format_frame.pack(fill='x', pady=5)
+        
+        tk.Label(format_frame, text="Report Format:", font=('Segoe UI', 10), 
+                bg='#2d2d2d', fg='#ffffff', width=15, anchor='w').pack(side='left')
+        
+        self.format_var = tk.StringVar(value=self.report_format)
+        format_box = ttk.Combobox(format_frame, textvariable=self.format_var, 
+                                  values=['xlsx', 'csv', 'jsonl', 'html'], 
+                                  state='readonly', width=10)
+        format_box.pack(side='left', padx=10)
+        
         # Start Button
         btn_frame = tk.Frame(self.root, bg='#1e1e1e')
         btn_frame.pack(pady=15)
@@ -148,11 +192,15 @@ class SurveyQAValidator:
             self.start_btn.config(state='normal', bg='#0e7c3d')
     
     def log(self, message):
+        if self.root is None:
+            print(message)
+            return
         self.log_text.insert(tk.END, f"{message}\n")
         self.log_text.see(tk.END)
         self.root.update_idletasks()
     
     def start_validation(self):
+        self.report_format = self.format_var.get()
         self.start_btn.config(state='disabled')
         self.progress_bar.start(10)
         self.progress_label.config(text="Validation in progress...")
@@ -166,31 +214,7 @@ class SurveyQAValidator:
     
     def run_validation(self):
         try:
-            # Parse documents
-            self.log("\n[1/5] Parsing Word document...")
-            self.parse_word_document()
-            self.log(f"✓ Found {len(self.word_questions)} questions in Word document")
-            
-            self.log("\n[2/5] Parsing XML document...")
-            self.parse_xml_document()
-            self.log(f"✓ Found {len(self.xml_questions)} questions in XML document")
-            
-            self.log("\n[3/5] Performing cross-validation...")
-            self.validate_questions()
-            
-            self.log("\n[4/5] Generating validation report...")
-            output_file = self.generate_report()
-            
-            self.log("\n[5/5] Validation complete!")
-            self.log(f"✓ Report saved to: {output_file}")
-            
-            # Show summary
-            passed = sum(1 for r in self.validation_results if r['Status'] == 'TRUE')
-            failed = len(self.validation_results) - passed
-            self.log(f"\n{'='*60}")
-            self.log(f"SUMMARY: {passed} passed, {failed} failed out of {len(self.validation_results)} questions")
-            self.log(f"{'='*60}")
-            
+            output_file = self.execute_validation()
             self.root.after(0, lambda: self.validation_complete(output_file))
             
         except Exception as e:
@@ -199,6 +223,38 @@ class SurveyQAValidator:
             self.root.after(0, lambda: messagebox.showerror("Validation Error", str(e)))
             self.root.after(0, self.reset_ui)
     
+    def execute_validation(self):
+        """Run every validation step and return the report path"""
+        # Parse documents
+        self.log("\n[1/5] Parsing Word document...")
+        self.parse_word_document()
+        self.log(f"✓ Found {len(self.word_questions)} questions in Word document")
+        
+        self.log("\n[2/5] Parsing XML document...")
+        self.parse_xml_document()
+        self.log(f"✓ Found {len(self.xml_questions)} questions in XML document")
+        if self.loop_index:
+            templates = len(set(self.loop_index.values()))
+            self.log(f"✓ Mapped {len(self.loop_index)} looped labels to {templates} loop templates")
+        
+        self.log("\n[3/5] Performing cross-validation...")
+        self.validate_questions()
+        
+        self.log("\n[4/5] Generating validation report...")
+        output_file = self.generate_report()
+        
+        self.log("\n[5/5] Validation complete!")
+        self.log(f"✓ Report saved to: {output_file}")
+        
+        # Show summary
+        passed = sum(1 for r in self.validation_results if r['Status'] == 'TRUE')
+        failed = len(self.validation_results) - passed
+        self.log(f"\n{'='*60}")
+        self.log(f"SUMMARY: {passed} passed, {failed} failed out of {len(self.validation_results)} questions")
+        self.log(f"{'='*60}")
+        
+        return output_file
+    
     def parse_word_document(self):
         """Parse Word document and extract questions"""
         self.word_questions = []
@@ -322,33 +378,82 @@ class SurveyQAValidator:
         
         return '\n'.join(cleaned_lines)
     
-    def parse_xml_document(self):
-        """Parse XML document and extract questions - handles Decipher format with advanced error recovery"""
-        self.xml_questions = []
+    def detect_xml_encoding(self, buffer):
+        """Detect encoding from the BOM or XML declaration, returning (encoding, BOM length)"""
+        boms = [
+            (codecs.BOM_UTF32_LE, 'utf-32-le'),
+            (codecs.BOM_UTF32_BE, 'utf-32-be'),
+            (codecs.BOM_UTF8, 'utf-8'),
+            (codecs.BOM_UTF16_LE, 'utf-16-le'),
+            (codecs.BOM_UTF16_BE, 'utf-16-be')
+        ]
+        head = buffer[:200]
+        for bom, encoding in boms:
+            if head.startswith(bom):
+                return encoding, len(bom)
         
-        # Read the file content
-        with open(self.xml_file, 'r', encoding='utf-8', errors='ignore') as f:
-            xml_content = f.read()
+        # UTF-16 without a BOM still starts with '<?' in the wrong width
+        if head.startswith(b'<\x00?\x00'):
+            return 'utf-16-le', 0
+        if head.startswith(b'\x00<\x00?'):
+            return 'utf-16-be', 0
+        
+        declaration = re.match(rb'<\?xml[^>]*?encoding\s*=\s*["\']([A-Za-z0-9._-]+)["\']', head)
+        if declaration:
+            encoding = declaration.group(1).decode('ascii')
+            try:
+                codecs.lookup(encoding)
+                return encoding, 0
+            except LookupError:
+                pass
+        
+        return 'utf-8', 0
+    
+    def xml_error_context(self, buffer, encoding, bom_length, error_line):
+        """Yield (line number, byte offset, text) around an error line, scanning the buffer for newlines"""
+        newline = '\n'.encode(encoding)
+        first_line = max(1, error_line - 2)
+        line_number = 1
+        offset = bom_length
+        
+        while line_number <= error_line + 2:
+            line_end = buffer.find(newline, offset)
+            if line_end == -1:
+                line_end = len(buffer)
+            if line_number >= first_line:
+                text = codecs.decode(buffer[offset:line_end], encoding, 'replace')
+                yield line_number, offset, text
+            if line_end == len(buffer):
+                break
+            offset = line_end + len(newline)
+            line_number += 1
+    
+    def parse_xml_buffer(self, buffer):
+        """Parse a memory-mapped XML buffer - handles Decipher format with advanced error recovery"""
+        encoding, bom_length = self.detect_xml_encoding(buffer)
+        self.log(f"  Detected encoding: {encoding}")
         
         # Try multiple parsing strategies
         root = None
-        parsing_method = "unknown"
         
-        # Strategy 1: Try standard parsing
+        # Strategy 1: Try standard parsing straight from the mapped buffer
         try:
-            tree = ET.parse(self.xml_file)
-            root = tree.getroot()
-            parsing_method = "standard"
+            parser = ET.XMLParser()
+            parser.feed(buffer)
+            root = parser.close()
             self.log("  Using standard XML parsing")
         except ET.ParseError as e:
             self.log(f"  Standard parsing failed: {str(e)}")
             
+            # Only decode the buffer once the recovery path actually needs text
+            with memoryview(buffer) as view:
+                xml_content = codecs.decode(view[bom_length:], encoding, 'replace')
+            
             # Strategy 2: Clean the XML and try again
             try:
                 self.log("  Attempting to clean and fix XML issues...")
                 cleaned_content = self.clean_xml_content(xml_content)
                 root = ET.fromstring(cleaned_content)
-                parsing_method = "cleaned"
                 self.log("  ✓ XML issues fixed and parsed successfully")
             except ET.ParseError as e2:
                 self.log(f"  Cleaned parsing failed: {str(e2)}")
@@ -358,50 +463,91 @@ class SurveyQAValidator:
                     self.log("  Applying Decipher XML compatibility mode...")
                     
                     # Remove XML declaration if present
-                    xml_lines = xml_content.split('\n')
-                    if xml_lines and xml_lines[0].strip().startswith('<?xml'):
-                        xml_lines = xml_lines[1:]
+                    # (line_shift maps wrapped-document lines back to file lines)
+                    line_shift = -1
+                    first_line, _, remainder = xml_content.partition('\n')
+                    if first_line.strip().startswith('<?xml'):
+                        xml_content = remainder
+                        line_shift = 0
                     
-                    clean_content = '\n'.join(xml_lines)
-                    cleaned_content = self.clean_xml_content(clean_content)
+                    cleaned_content = self.clean_xml_content(xml_content)
                     wrapped_xml = f'<root>\n{cleaned_content}\n</root>'
                     
                     root = ET.fromstring(wrapped_xml)
-                    parsing_method = "wrapped"
                     self.log("  ✓ Successfully parsed using compatibility mode")
                 except ET.ParseError as e3:
                     # Strategy 4: Show detailed error information
                     self.log(f"  All parsing strategies failed")
                     self.log(f"  Error: {str(e3)}")
                     
-                    # Extract line number from error
-                    error_match = re.search(r'line (\d+)', str(e3))
-                    if error_match:
-                        error_line = int(error_match.group(1))
+                    # The error line refers to the wrapped document; map it back to the file
+                    if e3.position:
+                        error_line = max(1, e3.position[0] + line_shift)
                         self.log(f"\n  Problematic area around line {error_line}:")
-                        lines = xml_content.split('\n')
-                        start = max(0, error_line - 3)
-                        end = min(len(lines), error_line + 2)
-                        for i in range(start, end):
-                            marker = " >>> " if i == error_line - 1 else "     "
-                            self.log(f"{marker}{i+1}: {lines[i][:100]}")
+                        for line_number, offset, text in self.xml_error_context(buffer, encoding, bom_length, error_line):
+                            marker = " >>> " if line_number == error_line else "     "
+                            self.log(f"{marker}{line_number} (byte {offset}): {text[:100]}")
                     
-                    raise Exception(f"Unable to parse XML file. {str(e3)}")
+                    # Report the position in the file, not in the wrapped document
+                    error_message = str(e3)
+                    if e3.position:
+                        error_message = re.sub(r':? line \d+, column \d+$', '', error_message)
+                        error_message = f"{error_message}: line {error_line}, column {e3.position[1]}"
+                    raise Exception(f"Unable to parse XML file. {error_message}")
+        
+        return root
+    
+    def parse_xml_document(self):
+        """Parse XML document and extract questions - handles Decipher format with advanced error recovery"""
+        self.xml_questions = []
+        
+        # Memory-map the file once; the parser and the recovery path share the same buffer
+        with open(self.xml_file, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise Exception("XML document is empty")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                root = self.parse_xml_buffer(buffer)
         
         if root is None:
             raise Exception("Failed to parse XML document")
         
         question_sequence = 0
+        template_sequence = {}
+        
+        # Map every element inside a <loop> to the rows of each enclosing loop, outermost first
+        loop_chains = {}
+        for loop in root.iter('loop'):
+            rows = []
+            for looprow in loop.findall('looprow'):
+                row = {var.get('name', ''): self.get_element_text(var) for var in looprow.findall('loopvar')}
+                row['label'] = looprow.get('label', '')
+                rows.append(row)
+            if not rows:
+                continue
+            for child in loop.iter():
+                loop_chains.setdefault(child, []).append(rows)
         
         # Find all question elements
         for elem in root.iter():
             if elem.tag in ['radio', 'checkbox', 'text', 'textarea', 'number', 'select', 'html']:
-                question_sequence += 1
                 label = elem.get('label', '')
+                loop_chain = loop_chains.get(elem, [])
+                template = self.loop_template_label(label, loop_chain)
+                
+                # Looped instances share the sequence position of their template
+                if loop_chain and template in template_sequence:
+                    sequence = template_sequence[template]
+                else:
+                    question_sequence += 1
+                    sequence = question_sequence
+                    if loop_chain:
+                        template_sequence[template] = sequence
                 
                 question = {
                     'label': label,
-                    'sequence': question_sequence,
+                    'template': template,
+                    'loop_chain': loop_chain,
+                    'sequence': sequence,
                     'type': elem.tag,
                     'element': elem,
                     'attributes': elem.attrib,
@@ -445,6 +591,66 @@ class SurveyQAValidator:
                     })
                 
                 self.xml_questions.append(question)
+        
+        self.build_loop_index()
+    
+    def loop_template_label(self, label, loop_chain):
+        """Resolve the template label a looped question was generated from"""
+        if not loop_chain:
+            return label
+        
+        # Unexpanded Decipher label, e.g. Q5_[loopvar: label]
+        if '[loopvar:' in label:
+            return re.sub(r'_?\[loopvar:\s*\w+\]', '', label)
+        
+        # Already expanded label, e.g. Q5_1 inside a loop with looprow "1";
+        # strip one suffix per enclosing loop, innermost first
+        template = label
+        for rows in reversed(loop_chain):
+            for row in rows:
+                suffix = '_' + row['label']
+                if row['label'] and template.endswith(suffix) and len(template) > len(suffix):
+                    template = template[:-len(suffix)]
+                    break
+        
+        return template
+    
+    def iter_loop_instances(self, question):
+        """Lazily yield the concrete labels a looped question generates"""
+        label = question['label']
+        if not question['loop_chain'] or '[loopvar:' not in label:
+            yield label
+            return
+        
+        # Expand over every combination of enclosing loop rows; inner loop variables win name clashes
+        for combination in itertools.product(*question['loop_chain']):
+            loop_vars = {}
+            for row in combination:
+                loop_vars.update(row)
+            # Unresolved variables are left in place so they stay visible in the report
+            yield re.sub(r'\[loopvar:\s*(\w+)\]',
+                         lambda m: loop_vars.get(m.group(1), m.group(0)), label)
+    
+    def build_loop_index(self):
+        """Index generated loop labels back to their template question label"""
+        self.loop_index = {}
+        
+        # A looped template that clashes with a standalone question is keyed by its own label
+        standalone_labels = {q['label'] for q in self.xml_questions if not q['loop_chain']}
+        
+        for question in self.xml_questions:
+            if not question['loop_chain']:
+                continue
+            
+            if question['template'] in standalone_labels:
+                self.log(f"  ⚠ Looped question '{question['label']}' shares label '{question['template']}' "
+                         f"with a standalone question; validating it separately")
+                question['template'] = question['label']
+            
+            for instance in self.iter_loop_instances(question):
+                if '[loopvar:' in instance and instance not in self.loop_index:
+                    self.log(f"  ⚠ Unresolved loop variable in '{instance}'")
+                self.loop_index[instance] = question['template']
     
     def get_element_text(self, element):
         """Extract text content from XML element, preserving formatting tags"""
@@ -456,69 +662,111 @@ class SurveyQAValidator:
         """Perform validation between Word and XML questions"""
         self.validation_results = []
         
-        # Create lookup dictionaries
-        word_dict = {q['label']: q for q in self.word_questions}
-        xml_dict = {q['label']: q for q in self.xml_questions}
+        # Create lookup dictionaries keyed by template label; Word questions that
+        # name a loop instance resolve to the template they were generated from
+        word_dict = {}
+        for q in self.word_questions:
+            key = self.loop_index.get(q['label'], q['label'])
+            if q['label'] in self.loop_index and key in word_dict:
+                self.log(f"  ⚠ Word questions '{word_dict[key]['label']}' and '{q['label']}' both map to "
+                         f"'{key}'; validating '{word_dict[key]['label']}' only")
+                continue
+            word_dict[key] = q
+        
+        # Looped XML elements sharing a template are all kept, since already expanded
+        # instances carry their own title and comment; plain labels keep the last one
+        xml_groups = {}
+        for q in self.xml_questions:
+            if q['loop_chain']:
+                xml_groups.setdefault(q['template'], []).append(q)
+            else:
+                xml_groups[q['template']] = [q]
+        
+        # Kept for report writers that need the matched questions
+        self.word_lookup = word_dict
+        self.xml_lookup = {}
         
         # Get all unique labels
-        all_labels = set(word_dict.keys()) | set(xml_dict.keys())
+        all_labels = set(word_dict.keys()) | set(xml_groups.keys())
         
         for label in sorted(all_labels):
             word_q = word_dict.get(label)
-            xml_q = xml_dict.get(label)
             
-            result = {
-                'Word Question Label': label if word_q else '',
-                'XML Question Label': label if xml_q else '',
-                'Present in Word': 'Yes' if word_q else 'No',
-                'Present in XML': 'Yes' if xml_q else 'No',
-                'Sequence Status': '',
-                'Word Sequence Position': word_q['sequence'] if word_q else '',
-                'XML Sequence Position': xml_q['sequence'] if xml_q else '',
-                'Status': 'TRUE',
-                'Error Description': ''
-            }
+            if label not in xml_groups:
+                self.validation_results.append(self.compare_question(label, word_q, None))
+                continue
+            
+            # Each distinct element is validated once; an unexpanded template's
+            # result is fanned out to every instance it generates
+            for xml_q in xml_groups[label]:
+                result = self.compare_question(label, word_q, xml_q)
+                
+                if not xml_q['loop_chain']:
+                    self.xml_lookup[result['XML Question Label']] = xml_q
+                    self.validation_results.append(result)
+                    continue
+                
+                for instance in self.iter_loop_instances(xml_q):
+                    instance_result = dict(result)
+                    instance_result['XML Question Label'] = instance
+                    self.xml_lookup[instance] = xml_q
+                    self.validation_results.append(instance_result)
+    
+    def compare_question(self, label, word_q, xml_q):
+        """Compare one Word question with one XML question and build its result row"""
+        result = {
+            'Word Question Label': label if word_q else '',
+            'XML Question Label': label if xml_q else '',
+            'Present in Word': 'Yes' if word_q else 'No',
+            'Present in XML': 'Yes' if xml_q else 'No',
+            'Sequence Status': '',
+            'Word Sequence Position': word_q['sequence'] if word_q else '',
+            'XML Sequence Position': xml_q['sequence'] if xml_q else '',
+            'Status': 'TRUE',
+            'Error Description': ''
+        }
+        
+        errors = []
+        
+        # Check presence
+        if not word_q:
+            errors.append(f"Question '{label}' exists in XML but not in Word document")
+            result['Status'] = 'FALSE'
+        elif not xml_q:
+            errors.append(f"Question '{label}' exists in Word but not in XML document")
+            result['Status'] = 'FALSE'
+        else:
+            # Both exist - perform detailed validation
             
-            errors = []
+            # Check sequence
+            if word_q['sequence'] != xml_q['sequence']:
+                errors.append(f"Sequence mismatch: Word position {word_q['sequence']}, XML position {xml_q['sequence']}")
+                result['Sequence Status'] = 'Out of Sequence'
+                result['Status'] = 'FALSE'
+            else:
+                result['Sequence Status'] = 'Correct'
             
-            # Check presence
-            if not word_q:
-                errors.append(f"Question '{label}' exists in XML but not in Word document")
+            # Validate question type
+            type_errors = self.validate_question_type(word_q, xml_q)
+            if type_errors:
+                errors.extend(type_errors)
                 result['Status'] = 'FALSE'
-            elif not xml_q:
-                errors.append(f"Question '{label}' exists in Word but not in XML document")
+            
+            # Validate text content
+            text_errors = self.validate_text_content(word_q, xml_q)
+            if text_errors:
+                errors.extend(text_errors)
                 result['Status'] = 'FALSE'
-            else:
-                # Both exist - perform detailed validation
-                
-                # Check sequence
-                if word_q['sequence'] != xml_q['sequence']:
-                    errors.append(f"Sequence mismatch: Word position {word_q['sequence']}, XML position {xml_q['sequence']}")
-                    result['Sequence Status'] = 'Out of Sequence'
-                    result['Status'] = 'FALSE'
-                else:
-                    result['Sequence Status'] = 'Correct'
-                
-                # Validate question type
-                type_errors = self.validate_question_type(word_q, xml_q)
-                if type_errors:
-                    errors.extend(type_errors)
-                    result['Status'] = 'FALSE'
-                
-                # Validate text content
-                text_errors = self.validate_text_content(word_q, xml_q)
-                if text_errors:
-                    errors.extend(text_errors)
-                    result['Status'] = 'FALSE'
-                
-                # Validate formatting
-                format_errors = self.validate_formatting(word_q, xml_q)
-                if format_errors:
-                    errors.extend(format_errors)
-                    result['Status'] = 'FALSE'
             
-            result['Error Description'] = '; '.join(errors) if errors else 'All validations passed'
-            self.validation_results.append(result)
+            # Validate formatting
+            format_errors = self.validate_formatting(word_q, xml_q)
+            if format_errors:
+                errors.extend(format_errors)
+                result['Status'] = 'FALSE'
+        
+        result['Error Description'] = '; '.join(errors) if errors else 'All validations passed'
+        
+        return result
     
     def validate_question_type(self, word_q, xml_q):
         """Validate that XML question type matches Word question type"""
@@ -545,34 +793,45 @@ class SurveyQAValidator:
         
         return errors
     
+    def normalize_text(self, text):
+        """Normalize text for comparison"""
+        if not text:
+            return ''
+        # Remove extra whitespace
+        text = re.sub(r'\s+', ' ', text.strip())
+        # Remove trailing period from question labels only
+        text = re.sub(r'\.$', '', text)
+        # Remove [X] or [x] markers
+        text = re.sub(r'\[x\]|\[X\]', '', text, flags=re.IGNORECASE)
+        return text.strip()
+    
+    def find_text_mismatches(self, word_q, xml_q):
+        """Return normalized (Word, XML) pairs for the question text and instruction, or None where they match"""
+        mismatches = {}
+        
+        # Compare question text/title, then instruction/comment
+        for field, word_key, xml_key in [('text', 'text', 'title'), ('instruction', 'instruction', 'comment')]:
+            word_value = self.normalize_text(word_q.get(word_key, ''))
+            xml_value = self.normalize_text(xml_q.get(xml_key, ''))
+            
+            if word_value and xml_value and word_value != xml_value:
+                mismatches[field] = (word_value, xml_value)
+            else:
+                mismatches[field] = None
+        
+        return mismatches
+    
     def validate_text_content(self, word_q, xml_q):
         """Validate text content matches between Word and XML"""
         errors = []
+        mismatches = self.find_text_mismatches(word_q, xml_q)
         
-        # Normalize text for comparison
-        def normalize(text):
-            if not text:
-                return ''
-            # Remove extra whitespace
-            text = re.sub(r'\s+', ' ', text.strip())
-            # Remove trailing period from question labels only
-            text = re.sub(r'\.$', '', text)
-            # Remove [X] or [x] markers
-            text = re.sub(r'\[x\]|\[X\]', '', text, flags=re.IGNORECASE)
-            return text.strip()
-        
-        # Compare question text/title
-        word_text = normalize(word_q.get('text', ''))
-        xml_title = normalize(xml_q.get('title', ''))
-        
-        if word_text and xml_title and word_text != xml_title:
+        if mismatches['text']:
+            word_text, xml_title = mismatches['text']
             errors.append(f"Question text mismatch: Word='{word_text[:50]}...', XML='{xml_title[:50]}...'")
         
-        # Compare instruction/comment
-        word_instruction = normalize(word_q.get('instruction', ''))
-        xml_comment = normalize(xml_q.get('comment', ''))
-        
-        if word_instruction and xml_comment and word_instruction != xml_comment:
+        if mismatches['instruction']:
+            word_instruction, xml_comment = mismatches['instruction']
             errors.append(f"Instruction text mismatch: Word='{word_instruction[:50]}...', XML='{xml_comment[:50]}...'")
         
         return errors
@@ -603,10 +862,26 @@ class SurveyQAValidator:
         return errors
     
     def generate_report(self):
-        """Generate Excel report with validation results"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_file = f"QA_Validation_Report_{timestamp}.xlsx"
+        """Generate the validation report in the selected format"""
+        writers = {
+            'xlsx': self.write_xlsx_report,
+            'csv': self.write_csv_report,
+            'jsonl': self.write_jsonl_report,
+            'html': self.write_html_report
+        }
+        if self.report_format not in writers:
+            raise Exception(f"Unsupported report format: {self.report_format}")
+        
+        output_file = self.output_file
+        if not output_file:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            output_file = f"QA_Validation_Report_{timestamp}.{self.report_format}"
         
+        writers[self.report_format](output_file)
+        return output_file
+    
+    def write_xlsx_report(self, output_file):
+        """Write Excel report with validation results"""
         df = pd.DataFrame(self.validation_results)
         
         # Create Excel writer with formatting
@@ -618,8 +893,101 @@ class SurveyQAValidator:
             for idx, col in enumerate(df.columns):
                 max_length = max(df[col].astype(str).apply(len).max(), len(col)) + 2
                 worksheet.column_dimensions[chr(65 + idx)].width = min(max_length, 50)
+    
+    def write_csv_report(self, output_file):
+        """Stream validation results to CSV, one row per question"""
+        with open(output_file, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=REPORT_COLUMNS)
+            writer.writeheader()
+            for result in self.validation_results:
+                writer.writerow(result)
+    
+    def write_jsonl_report(self, output_file):
+        """Stream validation results to JSON Lines, one object per question"""
+        with open(output_file, 'w', encoding='utf-8') as f:
+            for result in self.validation_results:
+                f.write(json.dumps(result, ensure_ascii=False))
+                f.write('\n')
+    
+    def render_text_diff(self, word_text, xml_text):
+        """Render a word-level diff as HTML, marking Word-only text as removed and XML-only text as added"""
+        word_tokens = word_text.split()
+        xml_tokens = xml_text.split()
+        parts = []
         
-        return output_file
+        matcher = difflib.SequenceMatcher(None, word_tokens, xml_tokens, autojunk=False)
+        for op, w1, w2, x1, x2 in matcher.get_opcodes():
+            if op == 'equal':
+                parts.append(html.escape(' '.join(word_tokens[w1:w2])))
+                continue
+            if w2 > w1:
+                parts.append(f"<del>{html.escape(' '.join(word_tokens[w1:w2]))}</del>")
+            if x2 > x1:
+                parts.append(f"<ins>{html.escape(' '.join(xml_tokens[x1:x2]))}</ins>")
+        
+        return ' '.join(parts)
+    
+    def write_html_report(self, output_file):
+        """Write a self-contained HTML report with per-question text diffs"""
+        # Diffs are rendered once per XML element and reused for every loop instance it generates
+        diffs = {}
+        
+        passed = sum(1 for r in self.validation_results if r['Status'] == 'TRUE')
+        failed = len(self.validation_results) - passed
+        
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write('''<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>QA Validation Report</title>
+<style>
+body { font-family: 'Segoe UI', sans-serif; background: #1e1e1e; color: #ffffff; margin: 40px; }
+table { border-collapse: collapse; width: 100%; }
+th, td { border: 1px solid #3c3c3c; padding: 6px 10px; text-align: left; vertical-align: top; }
+th { background: #2d2d2d; }
+.pass { color: #4ec9b0; }
+.fail { color: #f48771; }
+.diff { font-family: Consolas, monospace; font-size: 90%; }
+del { background: #5a1d1d; text-decoration: line-through; }
+ins { background: #1d4a2d; text-decoration: none; }
+</style>
+</head>
+<body>
+<h1>Decipher Survey QA Validation Report</h1>
+''')
+            f.write(f"<p>Generated {html.escape(datetime.now().strftime('%Y-%m-%d %H:%M:%S'))}: "
+                    f"<span class=\"pass\">{passed} passed</span>, "
+                    f"<span class=\"fail\">{failed} failed</span> "
+                    f"out of {len(self.validation_results)} questions</p>\n")
+            f.write("<table>\n<tr><th>Word Label</th><th>XML Label</th><th>Status</th>"
+                    "<th>Error Description</th><th>Question Text Diff</th><th>Instruction Diff</th></tr>\n")
+            
+            for result in self.validation_results:
+                word_q = self.word_lookup.get(result['Word Question Label'])
+                xml_q = self.xml_lookup.get(result['XML Question Label'])
+                
+                # Only text and instruction checks that failed get a diff, built
+                # from the same normalized strings validation compared
+                text_diff = instruction_diff = ''
+                if result['Status'] == 'FALSE' and word_q and xml_q:
+                    if id(xml_q) not in diffs:
+                        mismatches = self.find_text_mismatches(word_q, xml_q)
+                        diffs[id(xml_q)] = tuple(
+                            self.render_text_diff(*mismatches[field]) if mismatches[field] else ''
+                            for field in ('text', 'instruction')
+                        )
+                    text_diff, instruction_diff = diffs[id(xml_q)]
+                
+                status_class = 'pass' if result['Status'] == 'TRUE' else 'fail'
+                f.write(f"<tr><td>{html.escape(result['Word Question Label'])}</td>"
+                        f"<td>{html.escape(result['XML Question Label'])}</td>"
+                        f"<td class=\"{status_class}\">{result['Status']}</td>"
+                        f"<td>{html.escape(result['Error Description'])}</td>"
+                        f"<td class=\"diff\">{text_diff}</td>"
+                        f"<td class=\"diff\">{instruction_diff}</td></tr>\n")
+            
+            f.write("</table>\n</body>\n</html>\n")
     
     def validation_complete(self, output_file):
         self.progress_bar.stop()
@@ -634,7 +1002,46 @@ class SurveyQAValidator:
         self.progress_label.config(text="Ready to start validation")
         self.start_btn.config(state='normal', bg='#0e7c3d')
 
+def run_headless(args):
+    """Run validation without the GUI; returns 0 if all questions pass, 1 if any fail, 3 on error"""
+    # Redirected output on Windows is not UTF-8; keep log symbols from aborting the run
+    for stream in (sys.stdout, sys.stderr):
+        if hasattr(stream, 'reconfigure'):
+            stream.reconfigure(encoding='utf-8', errors='backslashreplace')
+    
+    app = SurveyQAValidator(None)
+    app.word_file = args.word
+    app.xml_file = args.xml
+    app.report_format = args.format
+    app.output_file = args.output
+    
+    try:
+        app.execute_validation()
+    except Exception as e:
+        print(f"Error during validation: {str(e)}\n{traceback.format_exc()}", file=sys.stderr)
+        return 3
+    
+    failed = sum(1 for r in app.validation_results if r['Status'] != 'TRUE')
+    return 1 if failed else 0
+
 def main():
+    parser = argparse.ArgumentParser(
+        description="Decipher Survey QA Validator. Runs the GUI unless --word and --xml are given.",
+        epilog="Exit status in command line mode: 0 all questions passed, 1 some failed, "
+               "2 usage error, 3 validation error."
+    )
+    parser.add_argument('--word', help="Word questionnaire (.docx)")
+    parser.add_argument('--xml', help="Decipher survey XML")
+    parser.add_argument('--format', choices=['xlsx', 'csv', 'jsonl', 'html'], default='xlsx',
+                        help="Report format (default: xlsx)")
+    parser.add_argument('--output', help="Report path (default: QA_Validation_Report_<timestamp>.<format>)")
+    args = parser.parse_args()
+    
+    if args.word or args.xml:
+        if not (args.word and args.xml):
+            parser.error("--word and --xml must be given together")
+        sys.exit(run_headless(args))
+    
     root = tk.Tk()
     app = SurveyQAValidator(root)
     root.mainloop()